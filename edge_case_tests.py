@@ -3,7 +3,8 @@
 import json
 from pathlib import Path
 from src.match import (
-    find_attachment, find_transaction,
+    find_attachment, find_transaction, build_attachment_index,
+    precompute_attachments, find_attachment_batch, match_all,
     _normalize_reference, _names_match, _are_dates_compatible,
     _get_attachment_counterparty_names, _calculate_match_score
 )
@@ -22,6 +23,8 @@ def test_edge_cases():
         ("RF00 0000 0000 1234", "RF1234"),  # Finnish Banking reference
         ("12 34 56", "123456"),             # Spaces
         ("  12  34  56  ", "123456"),       # Extra spaces
+        ("9876\xa0543\xa02103", "98765432103"), # Non-breaking spaces
+        ("RF00\u2009 1234", "RF1234"),      # Thin space
         ("abc123def", "ABC123DEF"),         # Mixed case
         ("12.34-56", "12.34-56"),           # Special chars preserved
     ]
@@ -49,6 +52,9 @@ def test_edge_cases():
         ("Jane Doe", "Jane Smith", False),
         ("Apple Inc", "Orange Inc", False),
         ("A", "B", False),
+        ("Jane Smth", "Jane Smith", True),
+        ("Jane Doe", "Jake Doe", False),
+        ("Matti Meittiläinen", "Matti Meikäläinen", False),
     ]
     
     for name1, name2, expected in name_tests:
@@ -87,6 +93,8 @@ def test_edge_cases():
     test_date_compat("2024-07-15", {"due_date": "invalid"}, False)
     test_date_compat("2024-07-15", {}, False)                             # No dates
     test_date_compat("2024-07-15", {"due_date": None}, False)             # Null date
+    test_date_compat("2024-7-5", {"due_date": "2024-07-05"}, True)        # No zero padding
+    test_date_compat("2024-07-15", {"due_date": "2024-7-32"}, False)      # Not a calendar date
     
     # Amount matching edge cases
     print("\nAmount matching edge cases")
@@ -103,13 +111,19 @@ def test_edge_cases():
     test_amount_match(175.00, 175.00, 3)
     test_amount_match(-175.00, 175.00, 3)
     test_amount_match(200.00, 200.01, 0)
+    test_amount_match(2.00, 2.01, 0)
     test_amount_match(50.00, 50.005, 3)
+    # Amounts are compared after rounding to whole cents
+    test_amount_match(123.456789, 123.46, 3)
+    test_amount_match(100.0049, 100.0151, 0)
     test_amount_match(35.00, 35.00, 3)
     test_amount_match(-35.00, 35.00, 3)
     
     test_amount_match(175.00, 200.00, 0)
     test_amount_match(None, 175.00, 0)
     test_amount_match(50.00, None, 0)
+    test_amount_match(175.00, float("nan"), 0)
+    test_amount_match(175.00, float("inf"), 0)
     
     # Counterparty extraction edge cases
     print("\nCounterparty extraction edge cases")
@@ -170,10 +184,59 @@ def test_edge_cases():
     att_corp2 = {"id": 8004, "data": {"total_amount": 200, "due_date": "2024-07-18", "supplier": "Jane Doe Design"}}
     test_real_scenario("Similar names", tx_similar, [att_corp, att_corp2], att_corp2)
     
+    tx_typo = {"id": 9005, "amount": -175, "date": "2024-06-16", "contact": "Jane Smth"}
+    att_typo = {"id": 8009, "data": {"total_amount": 175, "due_date": "2024-06-20", "recipient": "Jane Smith"}}
+    test_real_scenario("Contact with a typo", tx_typo, [att_b, att_typo], att_typo)
+    
+    tx_other_person = {"id": 9006, "amount": -175, "date": "2024-06-16", "contact": "Jake Smith"}
+    test_real_scenario("Similar but different person", tx_other_person, [att_typo], None)
+    
+    tx_suffix = {"id": 9007, "amount": -100, "date": "2024-06-16", "contact": "Acme Oy"}
+    att_suffix = {"id": 8011, "data": {"total_amount": 100, "due_date": "2024-06-20", "supplier": "Acme Ltd"}}
+    test_real_scenario("Company suffix only in common", tx_suffix, [att_suffix], None)
+    
     tx_precise = {"id": 9003, "amount": -50.00, "date": "2024-07-15", "contact": None}
     att_precise = {"id": 8005, "data": {"total_amount": 50.05, "due_date": "2024-07-15"}}
     test_real_scenario("Amount precision", tx_precise, [att_precise], None)
     
+    att_nan = {"id": 8010, "data": {"total_amount": float("nan"), "due_date": "2024-07-15", "recipient": "Jane Smith"}}
+    test_real_scenario("NaN amount next to a valid one", tx_duplicate, [att_nan, att_a], att_a)
+    
+    # Reference index edge cases
+    print("\nReference index edge cases")
+    
+    att_ref_first = {"id": 8006, "data": {"total_amount": 10, "reference": "RF00 1234"}}
+    att_ref_dup = {"id": 8007, "data": {"total_amount": 20, "reference": "RF1234"}}
+    att_no_ref = {"id": 8008, "data": {"total_amount": 30, "reference": None}}
+    index = build_attachment_index([att_ref_first, att_ref_dup, att_no_ref])
+    status = "PASS" if list(index) == ["RF1234"] and index["RF1234"] is att_ref_first else "FAIL"
+    print(f"  {status} Index keys: {list(index)} (expected: ['RF1234'], first attachment wins)")
+    
+    tx_ref = {"id": 9004, "amount": -99, "date": "2024-07-15", "reference": "RF 0001234"}
+    result = find_attachment(tx_ref, [att_ref_first, att_ref_dup, att_no_ref], index=index)
+    result_id = result['id'] if result else None
+    status = "PASS" if result_id == 8006 else "FAIL"
+    print(f"  {status} Prebuilt index lookup: Found ATT {result_id} (expected 8006)")
+    
+    # Batch matching edge cases
+    print("\nBatch matching edge cases")
+    
+    batch_attachments = [att_a, att_b, att_corp, att_corp2, att_precise, att_ref_first]
+    batch_transactions = [tx_duplicate, tx_similar, tx_precise, tx_ref]
+    attachment_batch = precompute_attachments(batch_attachments)
+    batch_results = find_attachment_batch(batch_transactions, attachment_batch)
+    for transaction, batch_result in zip(batch_transactions, batch_results):
+        single_result = find_attachment(transaction, batch_attachments)
+        status = "PASS" if batch_result is single_result else "FAIL"
+        batch_id = batch_result['id'] if batch_result else None
+        print(f"  {status} TX {transaction['id']}: Batch found ATT {batch_id} (same as find_attachment)")
+    
+    all_matches = match_all(batch_transactions, batch_attachments)
+    all_ids = {tx_id: (att['id'] if att else None) for tx_id, att in all_matches.items()}
+    expected_ids = {9001: 8001, 9002: 8004, 9003: None, 9004: 8006}
+    status = "PASS" if all_ids == expected_ids else "FAIL"
+    print(f"  {status} match_all: {all_ids} (expected: {expected_ids})")
+    
     print("\nEdge case testing complete")
 
 if __name__ == "__main__":
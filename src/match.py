@@ -5,14 +5,36 @@ This file implements matching logic for the bank transactions and their matching
 """
 
 import re
-from datetime import datetime
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from math import isfinite
 from typing import List
 
 Attachment = dict[str, dict]
 Transaction = dict[str, dict]
+# Normalized name and its set of words, see _prepare_name()
+PreparedName = tuple[str, frozenset[str]]
+
+_WS_RE = re.compile(r'\s+')
+_LEAD_ZERO_RE = re.compile(r'^0+')
+
+# Company form suffixes that may differ between two names of the same party
+_COMPANY_SUFFIXES = frozenset({'oy', 'ltd', 'corp', 'inc', 'tmi', 'ab', 'as', 'gmbh', 'company', 'co'})
+
+# Attachment fields naming the other party, and our own company name to skip in them
+_COUNTERPARTY_FIELDS = ('issuer', 'recipient', 'supplier')
+_SELF_REFERENCE = 'example company'
+
+# Widest accepted amount difference in cents, covers ATM fees and banking charges
+_AMOUNT_TOLERANCE_CENTS = 1
 
 # Helper functions
 
+@lru_cache(maxsize=4096)
 def _normalize_reference(reference: str) -> str:
     """
     Normalizes reference numbers for exact matching.
@@ -26,16 +48,16 @@ def _normalize_reference(reference: str) -> str:
         return ""
     
     # Remove whitespace and convert to uppercase
-    normalized = re.sub(r'\s+', '', reference.upper())
+    normalized = _WS_RE.sub('', reference.upper())
     
     # Handle Finnish/IBAN references
     if normalized.startswith('RF'):
         prefix = 'RF'
         number_part = normalized[2:]
-        number_part = re.sub(r'^0+', '', number_part) or '0'
+        number_part = _LEAD_ZERO_RE.sub('', number_part) or '0'
         normalized = prefix + number_part
     else:
-        normalized = re.sub(r'^0+', '', normalized) or '0'
+        normalized = _LEAD_ZERO_RE.sub('', normalized) or '0'
     
     return normalized
 
@@ -53,14 +75,107 @@ def _normalize_name(name: str) -> str:
     return ' '.join(name.lower().split())
 
 
+@lru_cache(maxsize=4096)
+def _normalize_name_cached(name: str) -> str:
+    """Cached _normalize_name(), the same counterparty names are compared many times."""
+    return _normalize_name(name)
+
+
+def _levenshtein(text: str, pattern: str, score_cutoff: int) -> int:
+    """
+    Levenshtein distance using Myers' bit-parallel algorithm (Hyyrö's variant).
+    
+    Each DP column is packed into the bits of a Python int, so a whole column
+    is updated with a handful of integer operations instead of a loop over
+    characters. Returns score_cutoff + 1 as soon as the distance is known to
+    exceed score_cutoff.
+    """
+    if len(text) < len(pattern):
+        text, pattern = pattern, text
+    
+    if len(text) - len(pattern) > score_cutoff:
+        return score_cutoff + 1
+    if not pattern:
+        return len(text)
+    
+    # Bit masks of the positions where each character occurs in the pattern
+    peq = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    
+    mask = (1 << len(pattern)) - 1
+    last = 1 << (len(pattern) - 1)
+    pv = mask
+    mv = 0
+    score = len(pattern)
+    remaining = len(text)
+    
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        
+        # Every remaining character can lower the distance by at most one
+        remaining -= 1
+        if score - remaining > score_cutoff:
+            return score_cutoff + 1
+        
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    
+    return score
+
+
+def _is_single_word_typo(words1: frozenset[str], words2: frozenset[str]) -> bool:
+    """
+    Checks if two names differ only by a typo in one word - "Jane Smth" vs "Jane Smith".
+    
+    All other words must match exactly, so "Jane Doe" vs "Jake Doe" stays apart.
+    """
+    if len(words1) != len(words2) or len(words1) < 2:
+        return False
+    
+    only_in_1 = [word for word in words1 if word not in words2]
+    if len(only_in_1) != 1:
+        return False
+    word1 = only_in_1[0]
+    word2 = next(word for word in words2 if word not in words1)
+    
+    # At most 20% of the longer word may differ, short words must match exactly
+    max_distance = max(len(word1), len(word2)) // 5
+    return max_distance > 0 and _levenshtein(word1, word2, max_distance) <= max_distance
+
+
+@lru_cache(maxsize=4096)
+def _prepare_name(name: str) -> PreparedName:
+    """
+    Normalizes a name once into (normalized name, word set) for repeated comparisons.
+    
+    Cached as a pair so a repeated name costs a single cache lookup.
+    """
+    normalized_name = _normalize_name_cached(name)
+    return normalized_name, frozenset(normalized_name.split())
+
+
 def _names_match(name1: str, name2: str) -> bool:
     """Check if two names match allowing for variations."""
     if not name1 or not name2:
         return False
     
-    norm1 = _normalize_name(name1)
-    norm2 = _normalize_name(name2)
-    
+    return _names_match_pre(*_prepare_name(name1), *_prepare_name(name2))
+
+
+def _names_match_pre(norm1: str, words1: frozenset[str], norm2: str, words2: frozenset[str]) -> bool:
+    """_names_match() on names already prepared with _prepare_name()."""
     # Exact match
     if norm1 == norm2:
         return True
@@ -68,34 +183,43 @@ def _names_match(name1: str, name2: str) -> bool:
     if norm1 in norm2 or norm2 in norm1:
         return True
     
-    words1 = set(norm1.split())
-    words2 = set(norm2.split())
-    
     if len(words1) == 0 or len(words2) == 0:
         return False
         
-    common_words = words1.intersection(words2)
+    # Count common words with a plain loop, names are only a few words long
+    # so this beats allocating intersection and difference sets
+    common_count = 0
+    common_word = None
+    for word in words1:
+        if word in words2:
+            common_count += 1
+            common_word = word
+    
     total_words = min(len(words1), len(words2))
     
-    if len(common_words) >= 2:
-        overlap_ratio = len(common_words) / total_words
-        return overlap_ratio >= 0.5
-        
-    elif len(common_words) == 1 and total_words <= 2:
-        non_common1 = words1 - common_words
-        non_common2 = words2 - common_words
+    if common_count >= 2:
+        overlap_ratio = common_count / total_words
+        if overlap_ratio >= 0.5:
+            return True
         
+    elif common_count == 1 and total_words <= 2:
         # Exact subset match - "Matti" vs "Matti Meikäläinen"
-        if len(non_common1) == 0 or len(non_common2) == 0:
+        if len(words1) == 1 or len(words2) == 1:
             return True
-            
-        if len(non_common1) == 1 and len(non_common2) == 1:
-            word1 = list(non_common1)[0]
-            word2 = list(non_common2)[0]
-            suffixes = {'oy', 'ltd', 'corp', 'inc', 'tmi', 'ab', 'as', 'gmbh', 'company', 'co'}
-            if word1.lower() in suffixes or word2.lower() in suffixes:
+        
+        # Both have exactly one other word - "Company Oy" vs "Company Ltd"
+        if len(words1) == 2 and len(words2) == 2:
+            first1, second1 = words1
+            first2, second2 = words2
+            word1 = second1 if first1 == common_word else first1
+            word2 = second2 if first2 == common_word else first2
+            if word1 in _COMPANY_SUFFIXES or word2 in _COMPANY_SUFFIXES:
                 return True
     
+    # Fuzzy fallback for a typo in a single word - "Jane Smth" vs "Jane Smith"
+    if common_count >= 1 and len(words1) == len(words2) == common_count + 1:
+        return _is_single_word_typo(words1, words2)
+    
     return False
 
 
@@ -111,35 +235,37 @@ def _get_attachment_counterparty_names(attachment: Attachment) -> List[str]:
     Filters out "Example Company Oy" references.
     """
     data = attachment.get('data', {})
-    names = []
+    names = [data[field] for field in _COUNTERPARTY_FIELDS if field in data and data[field]]
     
+    # Filter out self-references to the company, normalized names are already lowercase
+    return [name for name in names if _SELF_REFERENCE not in _normalize_name_cached(name)]
 
-    for field in ['issuer', 'recipient', 'supplier']:
+
+def _get_attachment_counterparties(attachment: Attachment) -> list[PreparedName]:
+    """_get_attachment_counterparty_names() prepared for repeated name comparisons."""
+    data = attachment.get('data', {})
+    counterparties = []
+    
+    for field in _COUNTERPARTY_FIELDS:
         if field in data and data[field]:
-            names.append(data[field])
+            prepared = _prepare_name(data[field])
+            if _SELF_REFERENCE not in prepared[0]:
+                counterparties.append(prepared)
     
-    # Filter out self-references to the company
-    return [name for name in names if name and 'example company' not in name.lower()]
+    return counterparties
 
 
-def _calculate_name_specificity(name1: str, name2: str) -> int:
+def _name_specificity_pre(norm1: str, norm2: str) -> int:
     """
-    Calculates how specific/exact a name match is, how much overlap there is.
+    Calculates how specific/exact a match of two normalized names is, how much overlap there is.
     
     Scoring criteria/ Returns:
         5: One name is subset of other 
         4: Exact match
         3: Very close substring match (>75% overlap)
         2: Good substring match (one contained in other)
-        1: Word overlap match
-        0: No match
+        0: No substring match, word overlap and typo matches included
     """
-    if not name1 or not name2:
-        return 0
-    
-    norm1 = _normalize_name(name1)
-    norm2 = _normalize_name(name2)
-    
     # Exact match gets 4
     if norm1 == norm2:
         return 4
@@ -164,6 +290,63 @@ def _calculate_name_specificity(name1: str, name2: str) -> int:
     return 0
 
 
+def _fast_iso(date_str: str) -> tuple[int, int, int] | None:
+    """
+    Splits an ISO date ("2024-07-15") into (year, month, day) without raising.
+    
+    Like strptime's '%Y-%m-%d', month and day may be one digit ("2024-7-5").
+    Returns None for any other format or a date that is not on the calendar.
+    """
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        year_str, month_str, day_str = date_str[:4], date_str[5:7], date_str[8:10]
+    else:
+        parts = date_str.split('-')
+        if len(parts) != 3 or len(parts[0]) != 4 or not 1 <= len(parts[1]) <= 2 or not 1 <= len(parts[2]) <= 2:
+            return None
+        year_str, month_str, day_str = parts
+    
+    if not (date_str.isascii() and year_str.isdigit() and month_str.isdigit() and day_str.isdigit()):
+        return None
+    
+    year, month, day = int(year_str), int(month_str), int(day_str)
+    if year < 1 or not 1 <= month <= 12 or not 1 <= day <= monthrange(year, month)[1]:
+        return None
+    
+    return year, month, day
+
+
+@lru_cache(maxsize=8192)
+def _parse_iso_ordinal(date_str: str) -> int | None:
+    """
+    Parses an ISO date ("2024-07-15") into a proleptic Gregorian ordinal.
+    
+    Returns None for invalid dates. Cached, as the same date strings are
+    compared against many candidates.
+    """
+    parts = _fast_iso(date_str)
+    if parts is None:
+        return None
+    return date(*parts).toordinal()
+
+
+def _attachment_date_ordinals(att_data: dict) -> tuple[int, ...]:
+    """Parses the due, invoicing and receiving dates of an attachment, skipping invalid ones."""
+    ordinals = []
+    
+    for field in ['due_date', 'invoicing_date', 'receiving_date']:
+        if field in att_data and att_data[field]:
+            ordinal = _parse_iso_ordinal(att_data[field])
+            if ordinal is not None:
+                ordinals.append(ordinal)
+    
+    return tuple(ordinals)
+
+
+def _ordinals_compatible(tx_ord: int, att_ords: tuple[int, ...], tolerance_days: int = 15) -> bool:
+    """Checks if any pre-parsed attachment date is within tolerance of the transaction date."""
+    return any(abs(tx_ord - att_ord) <= tolerance_days for att_ord in att_ords)
+
+
 def _are_dates_compatible(tx_date: str, att_data: dict, tolerance_days: int = 15) -> bool:
     """
     Checks if transaction date is in range of 15 days with attachment dates.
@@ -173,148 +356,313 @@ def _are_dates_compatible(tx_date: str, att_data: dict, tolerance_days: int = 15
     - Late payment (after due date) 
     - Processing delays
     """
-    try:
-        tx_dt = datetime.strptime(tx_date, '%Y-%m-%d')
-        
-        # Check against all available date fields
-        date_fields = ['due_date', 'invoicing_date', 'receiving_date']
-        
-        for field in date_fields:
-            if field in att_data and att_data[field]:
-                try:
-                    att_dt = datetime.strptime(att_data[field], '%Y-%m-%d')
-                    diff_days = abs((tx_dt - att_dt).days)
-                    
-                    if diff_days <= tolerance_days:
-                        return True
-                        
-                except ValueError:
-                    continue
-        
-        return False
-    except ValueError:
+    tx_ord = _parse_iso_ordinal(tx_date)
+    if tx_ord is None:
         return False
+    
+    return _ordinals_compatible(tx_ord, _attachment_date_ordinals(att_data), tolerance_days)
+
+
+def _amount_cents(amount) -> tuple[int, bool] | None:
+    """
+    Converts an amount to (absolute whole cents, is exact to the cent).
+    
+    Returns None for a missing, NaN or infinite amount. 50.005 becomes
+    (5000, False) and -175.00 becomes (17500, True).
+    """
+    if amount is None:
+        return None
+    
+    value = float(amount)
+    if not isfinite(value):
+        return None
+    
+    hundredths = abs(value) * 100
+    cents = int(round(hundredths))
+    return cents, abs(hundredths - cents) < 0.001
+
+
+def _transaction_cents(transaction: Transaction) -> int | None:
+    """Absolute transaction amount in whole cents, None when missing."""
+    amount = _amount_cents(transaction.get('amount'))
+    return amount[0] if amount else None
+
+
+def _attachment_cents(attachment: Attachment) -> int | None:
+    """Absolute attachment total in whole cents, None when missing."""
+    amount = _amount_cents(attachment.get('data', {}).get('total_amount'))
+    return amount[0] if amount else None
+
+
+def _is_cent_mismatch(tx_cents: int, att_cents: int) -> bool:
+    """
+    Detects precision mismatches vs legitimate banking differences between round amounts one cent apart.
+    
+    200.00 vs 200.01 is a mismatch, but common banking scenarios like 99.99 vs 100.00
+    are excluded as there can be a small charge difference.
+    """
+    is_banking_pattern = (
+        (tx_cents % 100 == 99 and att_cents % 100 == 0) or
+        (att_cents % 100 == 99 and tx_cents % 100 == 0)
+    )
+    
+    return not is_banking_pattern and (tx_cents % 100 == 0 or att_cents % 100 == 0)
 
 # =============================================================================
 # Scoring and matching logic
 # =============================================================================
 
-def _calculate_match_score(transaction: Transaction, attachment: Attachment) -> tuple[int, bool]:
+def _counterparty_score(tx_contact: PreparedName | None, att_counterparties: list[PreparedName]) -> tuple[int, bool]:
     """
-    This calculates confidence score for transaction and attachment.
+    Scores how well the transaction contact matches the attachment counterparties.
+    
+    Both sides are prepared with _prepare_name(), tx_contact is None when the
+    transaction has no contact.
     
     Returns:
         tuple: (score, has_counterparty_compatibility)
+    """
+    if tx_contact:
+        # Transaction has contact - must match attachment name
+        best_match_score = 0
+        has_counterparty_match = False
+        tx_norm, tx_words = tx_contact
         
-    Scoring system:
-        - Amount match: +3 (REQUIRED)
-        - Date compatibility: +2
-        - Name match: +2  
-        - Unknown counterparty: +1
+        for att_norm, att_words in att_counterparties:
+            if _names_match_pre(tx_norm, tx_words, att_norm, att_words):
+                # Calculate match specificity for better disambiguation, a typo
+                # match counts as the weakest match
+                specificity_score = _name_specificity_pre(tx_norm, att_norm)
+                if specificity_score == 0 and _is_single_word_typo(tx_words, att_words):
+                    specificity_score = 1
+                if specificity_score > best_match_score:
+                    best_match_score = specificity_score
+                    has_counterparty_match = True
         
-    Minimum score for confidence: 5
+        if not has_counterparty_match:
+            return 0, False
+        
+        # Award points based on match quality (enhanced scoring)
+        if best_match_score >= 5:  # More complete information preferred
+            return 5, True
+        elif best_match_score >= 4:  # Exact match
+            return 4, True
+        elif best_match_score >= 3:  # Very close substring match
+            return 3, True
+        elif best_match_score >= 2:  # Good substring match
+            return 2, True
+        else:  
+            return 1, True
+    elif att_counterparties:
+        # Transaction has no contact but attachment has counterparty - acceptable
+        return 1, True
+    else:
+        # Both have no counterparty info - acceptable
+        return 1, True
+
+
+@dataclass(slots=True, frozen=True)
+class TransactionRow:
+    """
+    Transaction fields extracted once for scoring, read as plain attributes.
+    
+    cents is the absolute amount in whole cents and None when missing,
+    whole_cents tells if the amount had no fraction of a cent, date_ord is
+    None when the date is missing or invalid, and contact is prepared with
+    _prepare_name().
+    """
+    transaction: Transaction
+    cents: int | None
+    whole_cents: bool
+    date_ord: int | None
+    contact: PreparedName | None
+    ref_norm: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class AttachmentRow:
+    """
+    Attachment fields extracted once for scoring, read as plain attributes.
+    
+    cents and whole_cents describe the amount as in TransactionRow,
+    date_ords holds the valid due, invoicing and receiving dates, and
+    counterparties are prepared with _prepare_name() with self-references
+    left out.
     """
+    attachment: Attachment
+    cents: int | None
+    whole_cents: bool
+    date_ords: tuple[int, ...]
+    counterparties: tuple[PreparedName, ...]
+    ref_norm: str | None
+
+
+def _transaction_row(transaction: Transaction) -> TransactionRow:
+    """Extracts and normalizes the fields of a transaction used for matching."""
     tx_amount = transaction.get('amount')
-    tx_date = transaction.get('date') 
+    tx_date = transaction.get('date')
     tx_contact = transaction.get('contact')
-    
+    tx_ref = transaction.get('reference')
+    cents, whole_cents = _amount_cents(tx_amount) or (None, False)
+    
+    return TransactionRow(
+        transaction=transaction,
+        cents=cents,
+        whole_cents=whole_cents,
+        date_ord=_parse_iso_ordinal(tx_date) if tx_date else None,
+        contact=_prepare_name(tx_contact) if tx_contact else None,
+        ref_norm=_normalize_reference(tx_ref) if tx_ref else None,
+    )
+
+
+def _attachment_row(attachment: Attachment) -> AttachmentRow:
+    """Extracts and normalizes the fields of an attachment used for matching."""
     att_data = attachment.get('data', {})
     att_amount = att_data.get('total_amount')
-    att_counterparties = _get_attachment_counterparty_names(attachment)
-    
-    score = 0
-    has_counterparty_match = False
+    att_ref = att_data.get('reference')
+    cents, whole_cents = _amount_cents(att_amount) or (None, False)
+    
+    return AttachmentRow(
+        attachment=attachment,
+        cents=cents,
+        whole_cents=whole_cents,
+        date_ords=_attachment_date_ordinals(att_data),
+        counterparties=tuple(_get_attachment_counterparties(attachment)),
+        ref_norm=_normalize_reference(att_ref) if att_ref else None,
+    )
+
+
+def preprocess_transactions(transactions: list[Transaction]) -> list[TransactionRow]:
+    """Converts transactions to TransactionRows, each field is parsed exactly once."""
+    return [_transaction_row(transaction) for transaction in transactions]
+
 
+def preprocess_attachments(attachments: list[Attachment]) -> list[AttachmentRow]:
+    """Converts attachments to AttachmentRows, each field is parsed exactly once."""
+    return [_attachment_row(attachment) for attachment in attachments]
+
+
+def _calculate_match_score_row(
+    tx_row: TransactionRow,
+    att_row: AttachmentRow,
+    date_ok: bool | None = None,
+) -> tuple[int, bool]:
+    """
+    _calculate_match_score() on preprocessed rows.
+    
+    date_ok can be passed in when the caller already knows the date
+    compatibility, otherwise it is computed from the row ordinals.
+    """
     # 1. AMOUNT MATCH (Required) - converts to absolute values since bank transactions show direction (negative for outgoing payments) while invoices usually show positive amounts
-    if att_amount is None or tx_amount is None:
+    if tx_row.cents is None or att_row.cents is None:
         return 0, False
     
-    # Advanced decimal precision handling with context-aware tolerance as there can be ATM fees or Banking charges
-    att_abs = abs(float(att_amount))
-    tx_abs = abs(float(tx_amount))
-    amount_diff = abs(att_abs - tx_abs)
-    
-    # Detect precision mismatches vs legitimate banking differences
-    def is_precision_mismatch():
-        # Check decimal places difference
-        tx_str = str(tx_abs)
-        att_str = str(att_abs)
-        tx_decimals = len(tx_str.split('.')[-1]) if '.' in tx_str else 0
-        att_decimals = len(att_str.split('.')[-1]) if '.' in att_str else 0
-        
-        # Case 1: Extreme precision difference (e.g., 123.456789 vs 123.46)
-        if abs(tx_decimals - att_decimals) > 3 and max(tx_decimals, att_decimals) > 4:
-            return True
-            
-        # Case 2: Exact cents differences in round numbers
-        # But exclude common banking scenarios like 99.99 vs 100.00 (there can be a small charge difference)
-        # Use tolerance to handle floating-point precision
-        if abs(amount_diff - 0.01) < 0.001:  # Essentially 0.01 difference
-            # Check if both amounts are "round" 
-            tx_is_round = abs((tx_abs * 100) % 1) < 0.001  
-            att_is_round = abs((att_abs * 100) % 1) < 0.001  
-            if tx_is_round and att_is_round:
-
-                is_banking_pattern = (
-                    (abs(tx_abs % 1 - 0.99) < 0.001 and abs(att_abs % 1) < 0.001) or
-                    (abs(att_abs % 1 - 0.99) < 0.001 and abs(tx_abs % 1) < 0.001)
-                )
-                
-                if not is_banking_pattern and (abs(tx_abs % 1) < 0.001 or abs(att_abs % 1) < 0.001):
-                    return True
-        
-        return False
-    
-    # Apply tolerance based on context
-    if is_precision_mismatch():
-        tolerance = 0.002 
-    else:
-        tolerance = 0.011 
+    cents_diff = abs(tx_row.cents - att_row.cents)
+    if cents_diff > _AMOUNT_TOLERANCE_CENTS:
+        return 0, False
     
-    if amount_diff > tolerance:
+    # A single cent between round amounts is a precision mismatch rather than a banking charge
+    if (cents_diff == 1 and tx_row.whole_cents and att_row.whole_cents
+            and _is_cent_mismatch(tx_row.cents, att_row.cents)):
         return 0, False
     
-    score += 3  # High confidence score for amount match
+    score = 3  # High confidence score for amount match
     
     # 2. DATE COMPATIBILITY 15 days tolerance
-    if tx_date and _are_dates_compatible(tx_date, att_data):
+    if date_ok is None:
+        date_ok = tx_row.date_ord is not None and _ordinals_compatible(tx_row.date_ord, att_row.date_ords)
+    if date_ok:
         score += 2
     
     # 3. COUNTERPARTY MATCHING with specificity scoring
-    if tx_contact:
-        # Transaction has contact - must match attachment name
-        best_match_score = 0
+    counterparty_score, has_counterparty_match = _counterparty_score(tx_row.contact, att_row.counterparties)
+    
+    return score + counterparty_score, has_counterparty_match
+
+
+def _calculate_match_score(transaction: Transaction, attachment: Attachment) -> tuple[int, bool]:
+    """
+    This calculates confidence score for transaction and attachment.
+    
+    Returns:
+        tuple: (score, has_counterparty_compatibility)
         
-        for att_counterparty in att_counterparties:
-            if _names_match(tx_contact, att_counterparty):
-                # Calculate match specificity for better disambiguation
-                specificity_score = _calculate_name_specificity(tx_contact, att_counterparty)
-                if specificity_score > best_match_score:
-                    best_match_score = specificity_score
-                    has_counterparty_match = True
+    Scoring system:
+        - Amount match: +3 (REQUIRED)
+        - Date compatibility: +2
+        - Name match: +2  
+        - Unknown counterparty: +1
         
-        if has_counterparty_match:
-            # Award points based on match quality (enhanced scoring)
-            if best_match_score >= 5:  # More complete information preferred
-                score += 5
-            elif best_match_score >= 4:  # Exact match
-                score += 4
-            elif best_match_score >= 3:  # Very close substring match
-                score += 3
-            elif best_match_score >= 2:  # Good substring match
-                score += 2
-            else:  
-                score += 1
-    elif att_counterparties:
-        # Transaction has no contact but attachment has counterparty - acceptable
-        score += 1
-        has_counterparty_match = True
-    else:
-        # Both have no counterparty info - acceptable
-        score += 1
-        has_counterparty_match = True
+    Minimum score for confidence: 5
+    """
+    return _calculate_match_score_row(_transaction_row(transaction), _attachment_row(attachment))
+
+# =============================================================================
+# Reference and amount indexes
+# =============================================================================
+
+def build_attachment_index(attachments: list[Attachment]) -> dict[str, Attachment]:
+    """
+    Maps normalized reference numbers to attachments for O(1) reference lookup.
+    
+    The first attachment wins if several share the same reference, matching
+    the order a linear scan would have found them in.
+    """
+    index = {}
+    
+    for attachment in attachments:
+        att_ref = attachment.get('data', {}).get('reference')
+        if att_ref:
+            index.setdefault(_normalize_reference(att_ref), attachment)
     
-    return score, has_counterparty_match
+    return index
+
+
+def build_transaction_index(transactions: list[Transaction]) -> dict[str, Transaction]:
+    """
+    Maps normalized reference numbers to transactions for O(1) reference lookup.
+    
+    The first transaction wins if several share the same reference.
+    """
+    index = {}
+    
+    for transaction in transactions:
+        tx_ref = transaction.get('reference')
+        if tx_ref:
+            index.setdefault(_normalize_reference(tx_ref), transaction)
+    
+    return index
+
+
+def _build_amount_index(cents: list[int | None]) -> dict[int, list[int]]:
+    """
+    Buckets list positions by absolute amount in whole cents.
+    
+    Lets the scoring loop visit only amount-compatible candidates instead of
+    every item, as the amount match is required for any score at all.
+    Missing amounts are left out entirely.
+    """
+    amount_index = defaultdict(list)
+    
+    for position, amount_cents in enumerate(cents):
+        if amount_cents is not None:
+            amount_index[amount_cents].append(position)
+    
+    return amount_index
+
+
+def _amount_candidates(amount_index: dict[int, list[int]], cents: int | None) -> list[int]:
+    """Returns positions of items whose amount is within tolerance, in list order."""
+    if cents is None:
+        return []
+    
+    positions = []
+    for bucket in range(cents - _AMOUNT_TOLERANCE_CENTS, cents + _AMOUNT_TOLERANCE_CENTS + 1):
+        positions.extend(amount_index.get(bucket, ()))
+    
+    # Keep original order so ties resolve the same way as a full scan
+    positions.sort()
+    return positions
 
 # =============================================================================
 # Main matching functions
@@ -323,6 +671,7 @@ def _calculate_match_score(transaction: Transaction, attachment: Attachment) ->
 def find_attachment(
     transaction: Transaction,
     attachments: list[Attachment],
+    index: dict[str, Attachment] | None = None,
 ) -> Attachment | None:
     """
     Finds the best matching attachment for a given transaction.
@@ -331,9 +680,14 @@ def find_attachment(
     1. Try exact reference number match (highest priority and guaranteed)
     2. Use confidence scoring with amount + date + counterparty
     
+    Only the amount-compatible attachments are fully preprocessed, use
+    match_all() to match many transactions against the same attachments.
+    
     Arguments:
         transaction: Single bank transaction to match
         attachments: List of all available attachments
+        index: Optional reference index from build_attachment_index(), pass it
+            when matching many transactions against the same attachments
         
     Returns:
         Best matching attachment or None if confidence score < 5
@@ -342,34 +696,35 @@ def find_attachment(
     
     # PRIORITY 1: Exact reference match (guaranteed 1:1)
     if tx_ref:
-        tx_ref_norm = _normalize_reference(tx_ref)
+        if index is None:
+            index = build_attachment_index(attachments)
         
-        for attachment in attachments:
-            att_ref = attachment.get('data', {}).get('reference')
-            if att_ref and _normalize_reference(att_ref) == tx_ref_norm:
-                return attachment
+        hit = index.get(_normalize_reference(tx_ref))
+        if hit:
+            return hit
     
     # PRIORITY 2: Multi-factor confidence scoring algorithm
-    candidates = []
-    
-    for attachment in attachments:
-        score, has_counterparty_match = _calculate_match_score(transaction, attachment)
+    best_attachment = None
+    best_score = 4  # Minimum confidence is 5
+    amount_index = _build_amount_index([_attachment_cents(attachment) for attachment in attachments])
+    tx_row = _transaction_row(transaction)
+    
+    for position in _amount_candidates(amount_index, tx_row.cents):
+        attachment = attachments[position]
+        score, has_counterparty_match = _calculate_match_score_row(tx_row, _attachment_row(attachment))
         
-        # Require minimum confidence and counterparty compatibility
-        if score >= 5 and has_counterparty_match:
-            candidates.append((attachment, score))
+        # Require minimum confidence and counterparty compatibility, first one wins ties
+        if has_counterparty_match and score > best_score:
+            best_score, best_attachment = score, attachment
     
     # Returns the highest scoring candidate
-    if candidates:
-        candidates.sort(key=lambda x: x[1], reverse=True) 
-        return candidates[0][0]
-    
-    return None
+    return best_attachment
 
 
 def find_transaction(
     attachment: Attachment,
     transactions: list[Transaction],
+    index: dict[str, Transaction] | None = None,
 ) -> Transaction | None:
     """
     Finds the best matching transaction for a given attachment.
@@ -381,6 +736,8 @@ def find_transaction(
     Arguments:
         attachment: Single attachment (invoice/receipt) to match
         transactions: List of all available transactions
+        index: Optional reference index from build_transaction_index(), pass it
+            when matching many attachments against the same transactions
         
     Returns:
          Best matching transaction or None if confidence score < 5
@@ -390,26 +747,176 @@ def find_transaction(
     
     # PRIORITY 1: Exact reference match (guaranteed 1:1)
     if att_ref:
-        att_ref_norm = _normalize_reference(att_ref)
+        if index is None:
+            index = build_transaction_index(transactions)
         
-        for transaction in transactions:
-            tx_ref = transaction.get('reference')
-            if tx_ref and _normalize_reference(tx_ref) == att_ref_norm:
-                return transaction
+        hit = index.get(_normalize_reference(att_ref))
+        if hit:
+            return hit
     
     # PRIORITY 2: Multi-factor confidence scoring with best match selection
-    candidates = []
-    
-    for transaction in transactions:
-        score, has_counterparty_match = _calculate_match_score(transaction, attachment)
+    best_transaction = None
+    best_score = 4  # Minimum confidence is 5
+    amount_index = _build_amount_index([_transaction_cents(transaction) for transaction in transactions])
+    att_row = _attachment_row(attachment)
+    
+    for position in _amount_candidates(amount_index, att_row.cents):
+        transaction = transactions[position]
+        score, has_counterparty_match = _calculate_match_score_row(_transaction_row(transaction), att_row)
         
-        # Requires minimum confidence and counterparty compatibility
-        if score >= 5 and has_counterparty_match:
-            candidates.append((transaction, score))
+        # Requires minimum confidence and counterparty compatibility, first one wins ties
+        if has_counterparty_match and score > best_score:
+            best_score, best_transaction = score, transaction
     
     # Returns the highest scoring candidate
-    if candidates:
-        candidates.sort(key=lambda x: x[1], reverse=True)  
-        return candidates[0][0]
+    return best_transaction
+
+# =============================================================================
+# Batch matching
+# =============================================================================
+
+@dataclass
+class AttachmentBatch:
+    """
+    Attachments preprocessed once for matching many transactions.
+    
+    rows[i] describes attachments[i], the indexes refer to those positions.
+    sorted_date_ords holds every attachment date ordinal in ascending
+    order, with date_order giving the position each one belongs to, for
+    range lookups with bisect.
+    """
+    rows: list[AttachmentRow]
+    reference_index: dict[str, Attachment]
+    amount_index: dict[int, list[int]]
+    sorted_date_ords: list[int]
+    date_order: list[int]
+
+
+def precompute_attachments(attachments: list[Attachment]) -> AttachmentBatch:
+    """
+    Normalizes amounts, dates, counterparties and references of all attachments once.
+    
+    Pass the result to find_attachment_batch(), which can then be called
+    repeatedly without redoing any of this work.
+    """
+    rows = preprocess_attachments(attachments)
+    
+    reference_index = {}
+    for row in rows:
+        if row.ref_norm is not None:
+            reference_index.setdefault(row.ref_norm, row.attachment)
+    
+    dated_positions = sorted(
+        (att_ord, position) for position, row in enumerate(rows) for att_ord in row.date_ords
+    )
+    
+    return AttachmentBatch(
+        rows=rows,
+        reference_index=reference_index,
+        amount_index=_build_amount_index([row.cents for row in rows]),
+        sorted_date_ords=[att_ord for att_ord, _ in dated_positions],
+        date_order=[position for _, position in dated_positions],
+    )
+
+
+def _date_compatible_positions(
+    batch: AttachmentBatch,
+    tx_ord: int | None,
+    tolerance_days: int,
+    max_size: int,
+) -> set[int] | None:
+    """
+    Positions of attachments with any date within tolerance of tx_ord.
+    
+    Found with two binary searches over the sorted date ordinals. Returns
+    None when the range holds more than max_size dates, checking the
+    candidates one by one is cheaper then.
+    """
+    if tx_ord is None:
+        return set()
+    
+    lo = bisect_left(batch.sorted_date_ords, tx_ord - tolerance_days)
+    hi = bisect_right(batch.sorted_date_ords, tx_ord + tolerance_days)
+    if hi - lo > max_size:
+        return None
     
-    return None
+    return set(batch.date_order[lo:hi])
+
+
+def find_attachment_batch(
+    transactions: list[Transaction],
+    batch: AttachmentBatch,
+    tolerance_days: int = 15,
+) -> list[Attachment | None]:
+    """
+    Finds the best matching attachment for each transaction.
+    
+    Gives the same results as calling find_attachment() for every
+    transaction, but reads attachment fields from the preprocessed batch.
+    
+    Arguments:
+        transactions: Bank transactions to match
+        batch: Preprocessed attachments from precompute_attachments()
+        
+    Returns:
+        Best matching attachment or None for each transaction, in order
+    """
+    results = []
+    
+    for tx_row in preprocess_transactions(transactions):
+        # PRIORITY 1: Exact reference match (guaranteed 1:1)
+        hit = batch.reference_index.get(tx_row.ref_norm) if tx_row.ref_norm is not None else None
+        if hit:
+            results.append(hit)
+            continue
+        
+        # PRIORITY 2: Multi-factor confidence scoring on amount-compatible candidates only
+        candidates = _amount_candidates(batch.amount_index, tx_row.cents)
+        date_positions = _date_compatible_positions(batch, tx_row.date_ord, tolerance_days, len(candidates))
+        
+        best_attachment = None
+        best_score = 4  # Minimum confidence is 5
+        
+        for position in candidates:
+            att_row = batch.rows[position]
+            if date_positions is not None:
+                date_ok = position in date_positions
+            else:
+                date_ok = _ordinals_compatible(tx_row.date_ord, att_row.date_ords, tolerance_days)
+            
+            # Without a contact the counterparty adds 1 point, so amount + counterparty
+            # stays at 4 and only date compatible attachments can reach the minimum of 5
+            if not date_ok and tx_row.contact is None:
+                continue
+            
+            score, has_counterparty_match = _calculate_match_score_row(tx_row, att_row, date_ok)
+            
+            # Require minimum confidence and counterparty compatibility, first one wins ties
+            if has_counterparty_match and score > best_score:
+                best_score, best_attachment = score, att_row.attachment
+        
+        results.append(best_attachment)
+    
+    return results
+
+
+def match_all(
+    transactions: list[Transaction],
+    attachments: list[Attachment],
+) -> dict[int, Attachment | None]:
+    """
+    Finds the best matching attachment for every transaction in one pass.
+    
+    Attachments are preprocessed once into rows with reference, amount and
+    date indexes, so each transaction only scores the few attachments that
+    share its reference or amount instead of the whole list.
+    
+    Arguments:
+        transactions: Bank transactions to match
+        attachments: List of all available attachments
+        
+    Returns:
+        Best matching attachment or None keyed by transaction id
+    """
+    matches = find_attachment_batch(transactions, precompute_attachments(attachments))
+    return {transaction.get('id'): match for transaction, match in zip(transactions, matches)}